@@ -1,10 +1,77 @@
+import contextlib
 import json
+import math
+import mmap
 import os
+import re
 import hashlib
+import hmac
 import secrets
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Dict, NamedTuple, Optional, Tuple, Union
 from enum import Enum
+from itertools import chain
+
+try:
+    import orjson
+except ImportError:  # optional speedup; fall back to the standard library
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # optional; large users.json files are then parsed whole
+    ijson = None
+
+
+def _dumps(obj) -> bytes:
+    """Encode obj as compact JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _loads(data):
+    """Decode JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _load_json_file(path: str):
+    """Parse a JSON file, memory-mapping it so orjson can decode straight from the page cache."""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if orjson is not None and size > 0:
+            try:
+                mm = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # Some platforms/filesystems refuse to map the file; read it normally
+                mm = None
+            if mm is not None:
+                with mm, memoryview(mm) as view:
+                    return orjson.loads(view)
+        return _loads(f.read())
+
+
+# path -> ((mtime_ns, size), parsed JSON) for files read through _cached_json_view
+_LOAD_CACHE: Dict[str, Tuple[Tuple[int, int], object]] = {}
+
+
+def _cached_json_view(path: str):
+    """Parsed contents of a JSON file, reused while its mtime and size are unchanged. Read-only."""
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    entry = _LOAD_CACHE.get(path)
+    if entry is None or entry[0] != stamp:
+        entry = (stamp, _load_json_file(path))
+        _LOAD_CACHE[path] = entry
+    return entry[1]
 
 
 def clear_console() -> None:
@@ -27,6 +94,54 @@ def pause(prompt: str = "Press Enter to continue...") -> None:
         # swallow and return to avoid crashing the app when user presses Ctrl+C
         print()
 
+
+def _norm(s: str) -> str:
+    """Normalize a menu answer (category, period, y/N) for case-insensitive matching."""
+    return s.strip().lower()
+
+# scrypt cost parameters for password hashing. Raising these makes every new
+# hash (and every rehash on login) more expensive to brute-force.
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SCRYPT_DKLEN = 32
+# Number of recent password verifications kept in memory per UserManager
+VERIFY_CACHE_SIZE = 512
+# users.json files larger than this are scanned incrementally by user_exists_streaming
+STREAMING_USERS_THRESHOLD = 16 * 1024 * 1024
+
+def _atomic_write_json(path: str, obj) -> None:
+    """Write obj as compact JSON to path via a temp file and atomic rename."""
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, 'wb', buffering=1 << 20) as f:
+            f.write(_dumps(obj))
+            # Make the new contents durable before the rename publishes them
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        # Don't leave a partial temp file behind if encoding or writing failed
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+def _write_lines(lines: Iterable[str]) -> None:
+    """Write a block of lines (any iterable, consumed once) to stdout in one call instead of one print per line."""
+    sys.stdout.write("\n".join(lines) + "\n")
+
+# Menu sort option -> get_all_expenses sort key
+_SORT_MAP = {"1": "date", "2": "amount", "3": "category"}
+
+# Budget over-limit flag -> (symbol, label) for the status columns
+_STATUS = {True: ("🔴", "OVER"), False: ("🟢", "OK")}
+
+# Row templates for the expense tables, compiled once instead of per-row f-strings
+_EXPENSE_ROW_FMT = "{:<12} {:<15} ${:<9.2f} {:<20}".format
+_NUMBERED_EXPENSE_ROW_FMT = "{:<4} {:<25} {:<12} {:<15} ${:<9.2f} {:<20}".format
+
 class ExpenseCategory(Enum):
     FOOD = "Food"
     TRANSPORTATION = "Transportation"
@@ -37,13 +152,114 @@ class ExpenseCategory(Enum):
     HEALTHCARE = "Healthcare"
     OTHER = "Other"
 
+class BudgetPeriod(Enum):
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+
+# Small integer code per category, used by the ExpenseTracker column cache
+_CATEGORY_INDEX = {category: i for i, category in enumerate(ExpenseCategory)}
+
+# Case-insensitive lookup of a category by its display name
+_CATEGORY_BY_NAME = {category.value.lower(): category for category in ExpenseCategory}
+# Category display names, in menu order, as printed by the category prompts
+_CATEGORY_VALUES_STR = ", ".join(category.value for category in ExpenseCategory)
+
+# Exact shape of a stored expense date
+_DATE_RE = re.compile(r"([0-9]{4})-([0-9]{2})-([0-9]{2})")
+
+def _parse_ymd(s: str) -> datetime:
+    """Parse a "YYYY-MM-DD" string with the C fromisoformat fast path instead of strptime."""
+    # Newer Pythons' fromisoformat also accepts other ISO shapes; only allow YYYY-MM-DD
+    if not _DATE_RE.fullmatch(s):
+        raise ValueError(f"invalid date: {s!r}")
+    return datetime.fromisoformat(s)
+
+def _fast_date_key(s: str) -> int:
+    """Decode a "YYYY-MM-DD" string into the ordered integer YYYYMMDD without strptime.
+
+    Only the length is checked; validate untrusted input with _checked_date_key first.
+    """
+    b = s.encode()
+    if len(b) != 10:
+        raise ValueError(f"invalid date: {s!r}")
+    return ((b[0] - 48) * 10_000_000 + (b[1] - 48) * 1_000_000 + (b[2] - 48) * 100_000
+            + (b[3] - 48) * 10_000 + (b[5] - 48) * 1000 + (b[6] - 48) * 100
+            + (b[8] - 48) * 10 + (b[9] - 48))
+
+def _canonical_date(s: str) -> str:
+    """Return a stored date as "YYYY-MM-DD", zero-padding legacy values such as "2024-1-5"."""
+    if _DATE_RE.fullmatch(s):
+        return s
+    # Older versions validated with strptime, which also accepts unpadded months and days
+    return datetime.strptime(s, "%Y-%m-%d").date().isoformat()
+
+def _checked_date_key(s: str) -> int:
+    """Like _fast_date_key, but raise ValueError for anything that is not a real date."""
+    _parse_ymd(s)
+    return _fast_date_key(s)
+
+def _date_key(d: date) -> int:
+    """Date key (YYYYMMDD) of a date object, without formatting it to a string first."""
+    return d.year * 10000 + d.month * 100 + d.day
+
+def _bound_key(value: Union[str, date]) -> int:
+    """Date key of a range bound given either as a "YYYY-MM-DD" string or a date."""
+    if isinstance(value, str):
+        return _checked_date_key(value)
+    return _date_key(value)
+
+def _date_from_key(key: int) -> str:
+    """Format a YYYYMMDD integer key back into "YYYY-MM-DD"."""
+    return f"{key // 10000:04d}-{key // 100 % 100:02d}-{key % 100:02d}"
+
+# Numeric helpers over the ExpenseTracker column cache (see _rebuild_arrays)
+
+class ExpenseScan(NamedTuple):
+    """Aggregates over all expenses, gathered in a single pass by _scan_columns."""
+    total: float
+    count: int
+    cat_totals: List[float]
+    cat_counts: List[int]
+    min_key: Optional[int]
+    max_key: Optional[int]
+
+def _scan_columns(amounts: array, cats: array, date_keys: array, n_cats: int) -> ExpenseScan:
+    """Compute totals, per-category sums/counts and the date span in one traversal."""
+    total = 0.0
+    cat_totals = [0.0] * n_cats
+    cat_counts = [0] * n_cats
+    min_key = max_key = None
+    for amount, code, key in zip(amounts, cats, date_keys):
+        total += amount
+        cat_totals[code] += amount
+        cat_counts[code] += 1
+        if min_key is None or key < min_key:
+            min_key = key
+        if max_key is None or key > max_key:
+            max_key = key
+    return ExpenseScan(total, len(amounts), cat_totals, cat_counts, min_key, max_key)
+
 class Expense:
-    def __init__(self, amount: float, category: ExpenseCategory, description: str, date: str = None):
+    __slots__ = ('amount', 'category', 'description', '_date', '_key', 'id')
+    
+    def __init__(self, amount: float, category: ExpenseCategory, description: str, date: str = None,
+                 id: str = None):
         self.amount = amount
         self.category = category
         self.description = description
         self.date = date if date else datetime.now().strftime("%Y-%m-%d")
-        self.id = f"{self.date}_{secrets.token_hex(8)}"
+        self.id = id if id else f"{self.date}_{secrets.token_hex(8)}"
+    
+    @property
+    def date(self) -> str:
+        return self._date
+    
+    @date.setter
+    def date(self, value: str):
+        # Keep the sortable integer form of the date next to the string
+        self._key = _fast_date_key(value)
+        self._date = value
     
     def to_dict(self) -> Dict:
         return {
@@ -56,28 +272,32 @@ class Expense:
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'Expense':
-        expense = cls(
+        return cls(
             amount=data['amount'],
             category=ExpenseCategory(data['category']),
             description=data['description'],
-            date=data['date']
+            date=_canonical_date(data['date']),
+            id=data['id']
         )
-        expense.id = data['id']
-        return expense
 
 class Budget:
-    def __init__(self, category: ExpenseCategory, amount: float, period: str = "monthly"):
+    __slots__ = ('category', 'amount', 'period')
+    
+    def __init__(self, category: ExpenseCategory, amount: float, period: BudgetPeriod = BudgetPeriod.MONTHLY):
         self.category = category
         self.amount = amount
-        self.period = period  # "daily", "weekly", "monthly"
-        self.id = f"budget_{category.value}_{period}"
+        self.period = BudgetPeriod(period)
+    
+    @property
+    def id(self) -> Tuple[ExpenseCategory, BudgetPeriod]:
+        return (self.category, self.period)
     
     def to_dict(self) -> Dict:
         return {
-            'id': self.id,
+            'id': f"budget_{self.category.value}_{self.period.value}",
             'category': self.category.value,
             'amount': self.amount,
-            'period': self.period
+            'period': self.period.value
         }
     
     @classmethod
@@ -85,61 +305,119 @@ class Budget:
         return cls(
             category=ExpenseCategory(data['category']),
             amount=data['amount'],
-            period=data['period']
+            period=BudgetPeriod(data['period'])
         )
 
 class UserManager:
     def __init__(self, users_file: str = "users.json"):
         self.users_file = users_file
         self.users = {}
+        # (stored hash, sha256 of password) -> result of the last verification
+        self._verify_cache: OrderedDict = OrderedDict()
+        self._verify_cache_lock = threading.Lock()
         self.load_users()
     
     def load_users(self):
         """Load users from JSON file"""
         if os.path.exists(self.users_file):
             try:
-                with open(self.users_file, 'r') as f:
-                    self.users = json.load(f)
+                # self.users is mutated in place, so parse a fresh copy rather than share the cache
+                self.users = _load_json_file(self.users_file)
             except (json.JSONDecodeError, KeyError) as e:
                 print(f"Error loading users: {e}")
                 self.users = {}
     
     def save_users(self):
         """Save users to JSON file"""
-        with open(self.users_file, 'w') as f:
-            json.dump(self.users, f, indent=2)
+        _atomic_write_json(self.users_file, self.users)
     
     def hash_password(self, password: str) -> str:
-        """Hash password using SHA-256 with salt"""
-        salt = secrets.token_hex(16)
-        return f"{salt}${hashlib.sha256((password + salt).encode()).hexdigest()}"
+        """Hash password using scrypt with a random salt"""
+        salt = secrets.token_bytes(16)
+        digest = hashlib.scrypt(password.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R,
+                                p=SCRYPT_P, dklen=SCRYPT_DKLEN)
+        return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}"
     
     def verify_password(self, password: str, hashed_password: str) -> bool:
-        """Verify password against hashed password"""
+        """Verify password against hashed password, reusing recent results"""
+        key = (hashed_password, hashlib.sha256(password.encode()).digest())
+        with self._verify_cache_lock:
+            if key in self._verify_cache:
+                self._verify_cache.move_to_end(key)
+                return self._verify_cache[key]
+        
+        result = self._verify_password_uncached(password, hashed_password)
+        with self._verify_cache_lock:
+            self._verify_cache[key] = result
+            if len(self._verify_cache) > VERIFY_CACHE_SIZE:
+                self._verify_cache.popitem(last=False)
+        return result
+    
+    def verify_many(self, pairs: List[Tuple[str, str]]) -> List[bool]:
+        """Verify several (username, password) pairs in parallel; unknown users fail"""
+        def verify(pair: Tuple[str, str]) -> bool:
+            username, password = pair
+            if username not in self.users:
+                return False
+            return self.verify_password(password, self.users[username]['password_hash'])
+        
+        # hashlib.scrypt releases the GIL, so threads verify on all cores at once
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            return list(executor.map(verify, pairs))
+    
+    def _verify_password_uncached(self, password: str, hashed_password: str) -> bool:
+        """Run the full key derivation and compare against the stored hash"""
         try:
-            salt, stored_hash = hashed_password.split('$')
-            computed_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-            return computed_hash == stored_hash
-        except:
+            parts = hashed_password.split('$')
+            if len(parts) == 2:
+                # Legacy SHA-256 hash (salt$hash), rehashed on next successful login
+                salt, stored_hash = parts
+                computed_hash = hashlib.sha256((password + salt).encode()).hexdigest()
+                return hmac.compare_digest(computed_hash, stored_hash)
+            
+            scheme, n, r, p, salt, stored_hash = parts
+            if scheme != 'scrypt':
+                return False
+            stored = bytes.fromhex(stored_hash)
+            computed = hashlib.scrypt(password.encode(), salt=bytes.fromhex(salt), n=int(n), r=int(r),
+                                      p=int(p), dklen=len(stored))
+            return hmac.compare_digest(computed, stored)
+        except (ValueError, TypeError):
             return False
     
-    def register_user(self, username: str, password: str) -> Tuple[bool, str]:
-        """Register a new user"""
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Check whether a stored hash uses outdated scheme or cost parameters"""
+        return not hashed_password.startswith(f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$")
+    
+    def _validate_registration(self, username: str, password: str) -> Optional[str]:
+        """Return an error message if the credentials cannot be registered"""
         if username in self.users:
-            return False, "Username already exists"
+            return "Username already exists"
         
         if len(username) < 3:
-            return False, "Username must be at least 3 characters"
+            return "Username must be at least 3 characters"
         
         if len(password) < 4:
-            return False, "Password must be at least 4 characters"
+            return "Password must be at least 4 characters"
         
-        # Store hashed password
-        self.users[username] = {
+        return None
+    
+    def _new_user_record(self, password: str) -> Dict:
+        """Build the stored record for a newly registered user"""
+        return {
             'password_hash': self.hash_password(password),
             'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             'last_login': None
         }
+    
+    def register_user(self, username: str, password: str) -> Tuple[bool, str]:
+        """Register a new user"""
+        error = self._validate_registration(username, password)
+        if error:
+            return False, error
+        
+        # Store hashed password
+        self.users[username] = self._new_user_record(password)
         
         self.save_users()
         
@@ -149,6 +427,28 @@ class UserManager:
         
         return True, "User registered successfully"
     
+    def register_users_bulk(self, creds: List[Tuple[str, str]]) -> Tuple[bool, str]:
+        """Register several users at once, writing users.json a single time"""
+        seen = set()
+        for username, password in creds:
+            if username in seen:
+                return False, f"{username}: Duplicate username in batch"
+            seen.add(username)
+            error = self._validate_registration(username, password)
+            if error:
+                return False, f"{username}: {error}"
+        
+        # Every user still gets an individually salted hash
+        for username, password in creds:
+            self.users[username] = self._new_user_record(password)
+        
+        self.save_users()
+        
+        for username, _ in creds:
+            os.makedirs(f"user_data/{username}", exist_ok=True)
+        
+        return True, f"{len(creds)} users registered successfully"
+    
     def login_user(self, username: str, password: str) -> Tuple[bool, str]:
         """Authenticate user login"""
         if username not in self.users:
@@ -157,6 +457,8 @@ class UserManager:
         stored_hash = self.users[username]['password_hash']
         
         if self.verify_password(password, stored_hash):
+            if self.needs_rehash(stored_hash):
+                self.users[username]['password_hash'] = self.hash_password(password)
             self.users[username]['last_login'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             self.save_users()
             return True, "Login successful"
@@ -167,6 +469,28 @@ class UserManager:
         """Check if user exists"""
         return username in self.users
     
+    def user_exists_streaming(self, username: str) -> bool:
+        """Check users.json on disk for a user, streaming large files instead of parsing them whole"""
+        if not os.path.exists(self.users_file):
+            return False
+        
+        if ijson is not None and os.path.getsize(self.users_file) > STREAMING_USERS_THRESHOLD:
+            try:
+                with open(self.users_file, 'rb') as f:
+                    for key, _ in ijson.kvitems(f, ''):
+                        if key == username:
+                            return True
+            except ijson.JSONError as e:
+                print(f"Error loading users: {e}")
+            return False
+        
+        # Membership test only, so read the cached parse without copying it
+        try:
+            return username in _cached_json_view(self.users_file)
+        except json.JSONDecodeError as e:
+            print(f"Error loading users: {e}")
+            return False
+    
     def get_user_stats(self, username: str) -> Dict:
         """Get user statistics"""
         if username not in self.users:
@@ -181,8 +505,27 @@ class ExpenseTracker:
     def __init__(self, username: str):
         self.username = username
         self.data_file = f"user_data/{username}/expenses.json"
-        self.expenses: List[Expense] = []
-        self.budgets: Dict[str, Budget] = {}
+        # Expenses keyed by id, in insertion order
+        self.expenses: Dict[str, Expense] = {}
+        self.budgets: Dict[Tuple[ExpenseCategory, BudgetPeriod], Budget] = {}
+        self._budgets_by_cat: Dict[ExpenseCategory, List[Budget]] = {}
+        # Nesting depth of buffered() blocks and whether a save was deferred
+        self._suspend_save = 0
+        self._dirty = False
+        # Column-wise copies of expense amounts, date keys and category codes,
+        # rebuilt lazily after any change to self.expenses
+        self._arrays_dirty = True
+        self._amounts = array('d')
+        self._date_keys = array('l')
+        self._cats = array('b')
+        # Cached result of _scan_expenses, cleared whenever the columns go stale
+        self._scan: Optional[ExpenseScan] = None
+        # Full sorted listings from get_all_expenses, keyed by (sort_by, reverse)
+        self._sorted_views: Dict[Tuple[str, bool], List[Expense]] = {}
+        # Lookup indexes over self.expenses: by category, and sorted by date key
+        self._by_cat: Dict[ExpenseCategory, List[Expense]] = {}
+        self._sorted_keys: List[int] = []
+        self._sorted_by_date: List[Expense] = []
         
         # Create user directory if it doesn't exist
         os.makedirs(f"user_data/{username}", exist_ok=True)
@@ -193,35 +536,118 @@ class ExpenseTracker:
         """Load expenses and budgets from user-specific JSON file"""
         if os.path.exists(self.data_file):
             try:
-                with open(self.data_file, 'r') as f:
-                    data = json.load(f)
-                    self.expenses = [Expense.from_dict(exp_data) for exp_data in data.get('expenses', [])]
-                    self.budgets = {budget_data['id']: Budget.from_dict(budget_data) 
-                                  for budget_data in data.get('budgets', [])}
-            except (json.JSONDecodeError, KeyError) as e:
-                print(f"Error loading data for {self.username}: {e}")
-                self.expenses = []
+                # Only read here (Expense/Budget copy the values out), so the cached parse is shared
+                data = _cached_json_view(self.data_file)
+                self.expenses = {}
+                reassigned = 0
+                for exp_data in data.get('expenses', []):
+                    expense = Expense.from_dict(exp_data)
+                    if expense.id in self.expenses:
+                        # Keep every row of files with repeated ids instead of letting the last one win
+                        expense.id = f"{expense.date}_{secrets.token_hex(8)}"
+                        reassigned += 1
+                    self.expenses[expense.id] = expense
+                if reassigned:
+                    print(f"Note: {reassigned} expense(s) in {self.username}'s data had duplicate IDs and were given new IDs")
+                budgets = [Budget.from_dict(budget_data) for budget_data in data.get('budgets', [])]
+                self.budgets = {budget.id: budget for budget in budgets}
+                self._rebuild_indexes()
+            except (json.JSONDecodeError, KeyError, ValueError) as e:
+                # Move the unreadable file aside so the next save cannot overwrite it with an empty ledger
+                backup = f"{self.data_file}.corrupt-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+                os.replace(self.data_file, backup)
+                print(f"Error loading data for {self.username}: {e} (original kept as {backup})")
+                self.expenses = {}
                 self.budgets = {}
+                self._rebuild_indexes()
     
     def save_data(self):
+        """Save expenses and budgets, deferring the write inside buffered()"""
+        if self._suspend_save:
+            self._dirty = True
+            return
+        self._save_data_now()
+    
+    def _save_data_now(self):
         """Save expenses and budgets to user-specific JSON file"""
         data = {
             'username': self.username,
             'last_updated': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            'expenses': [expense.to_dict() for expense in self.expenses],
+            'expenses': [expense.to_dict() for expense in self.expenses.values()],
             'budgets': [budget.to_dict() for budget in self.budgets.values()]
         }
-        with open(self.data_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        _atomic_write_json(self.data_file, data)
+    
+    @contextlib.contextmanager
+    def buffered(self):
+        """Defer saving until the outermost buffered() block exits, then save once"""
+        self._suspend_save += 1
+        try:
+            yield self
+        finally:
+            self._suspend_save -= 1
+            if not self._suspend_save and self._dirty:
+                self._dirty = False
+                self._save_data_now()
+    
+    def _rebuild_indexes(self):
+        """Rebuild every lookup index from self.expenses and self.budgets"""
+        self._budgets_by_cat = {}
+        for budget in self.budgets.values():
+            self._budgets_by_cat.setdefault(budget.category, []).append(budget)
+        self._by_cat = {}
+        self._sorted_keys = []
+        self._sorted_by_date = []
+        for expense in self.expenses.values():
+            self._add_index(expense)
+        self._mark_columns_stale()
+    
+    def _mark_columns_stale(self):
+        """Invalidate the column cache and everything derived from it"""
+        self._arrays_dirty = True
+        self._scan = None
+        self._sorted_views = {}
+    
+    def _add_index(self, expense: Expense):
+        """Register an expense in the lookup indexes"""
+        key = expense._key
+        pos = bisect_right(self._sorted_keys, key)
+        self._sorted_keys.insert(pos, key)
+        self._sorted_by_date.insert(pos, expense)
+        self._by_cat.setdefault(expense.category, []).append(expense)
+        self._mark_columns_stale()
+    
+    def _del_index(self, expense: Expense):
+        """Remove an expense from the lookup indexes"""
+        key = expense._key
+        lo = bisect_left(self._sorted_keys, key)
+        hi = bisect_right(self._sorted_keys, key)
+        for pos in range(lo, hi):
+            if self._sorted_by_date[pos] is expense:
+                del self._sorted_keys[pos]
+                del self._sorted_by_date[pos]
+                break
+        self._by_cat[expense.category].remove(expense)
+        self._mark_columns_stale()
     
     def add_expense(self, amount: float, category: ExpenseCategory, description: str, date: str = None) -> Tuple[bool, str]:
         """Add a new expense"""
         try:
+            # NaN/inf cannot round-trip through the JSON file (orjson writes them as null)
+            if not math.isfinite(amount):
+                return False, "Amount must be a finite number"
             if amount <= 0:
                 return False, "Amount must be positive"
+            if date:
+                # Only store dates that load_data can read back
+                try:
+                    _checked_date_key(date)
+                except ValueError:
+                    return False, "Invalid date"
                 
             expense = Expense(amount, category, description, date)
-            self.expenses.append(expense)
+            self._add_index(expense)
+            self.expenses[expense.id] = expense
             self.save_data()
             return True, f"Expense added successfully (ID: {expense.id})"
         except Exception as e:
@@ -229,138 +655,203 @@ class ExpenseTracker:
     
     def delete_expense(self, expense_id: str) -> Tuple[bool, str]:
         """Delete an expense by ID"""
-        initial_length = len(self.expenses)
-        self.expenses = [exp for exp in self.expenses if exp.id != expense_id]
-        if len(self.expenses) < initial_length:
-            self.save_data()
-            return True, "Expense deleted successfully"
-        return False, "Expense not found"
+        expense = self.expenses.pop(expense_id, None)
+        if expense is None:
+            return False, "Expense not found"
+        self._del_index(expense)
+        self.save_data()
+        return True, "Expense deleted successfully"
     
     def update_expense(self, expense_id: str, amount: float = None, category: ExpenseCategory = None, 
                       description: str = None, date: str = None) -> Tuple[bool, str]:
         """Update an existing expense"""
-        for expense in self.expenses:
-            if expense.id == expense_id:
-                if amount is not None:
-                    if amount <= 0:
-                        return False, "Amount must be positive"
-                    expense.amount = amount
-                if category is not None:
-                    expense.category = category
-                if description is not None:
-                    expense.description = description
-                if date is not None:
-                    expense.date = date
-                
-                self.save_data()
-                return True, "Expense updated successfully"
-        return False, "Expense not found"
+        expense = self.expenses.get(expense_id)
+        if expense is None:
+            return False, "Expense not found"
+        
+        if amount is not None:
+            if not math.isfinite(amount):
+                return False, "Amount must be a finite number"
+            if amount <= 0:
+                return False, "Amount must be positive"
+        if date is not None:
+            try:
+                _checked_date_key(date)
+            except ValueError:
+                return False, "Invalid date"
+        
+        # Drop fields that already hold the requested value
+        if amount == expense.amount:
+            amount = None
+        if category == expense.category:
+            category = None
+        if description == expense.description:
+            description = None
+        if date == expense.date:
+            date = None
+        if amount is None and category is None and description is None and date is None:
+            return True, "No changes made"
+        
+        # Category and date are index keys, so re-index around the change
+        reindex = category is not None or date is not None
+        if reindex:
+            self._del_index(expense)
+        if amount is not None:
+            expense.amount = amount
+            self._mark_columns_stale()
+        if category is not None:
+            expense.category = category
+        if description is not None:
+            expense.description = description
+        if date is not None:
+            expense.date = date
+        if reindex:
+            self._add_index(expense)
+        
+        self.save_data()
+        return True, "Expense updated successfully"
     
     def get_expense(self, expense_id: str) -> Optional[Expense]:
         """Get expense by ID"""
-        for expense in self.expenses:
-            if expense.id == expense_id:
-                return expense
-        return None
+        return self.expenses.get(expense_id)
     
     def get_expenses_by_category(self, category: ExpenseCategory) -> List[Expense]:
         """Get all expenses for a specific category"""
-        return [exp for exp in self.expenses if exp.category == category]
+        return list(self._by_cat.get(category, []))
+    
+    def _rebuild_arrays(self):
+        """Refresh the column cache from self.expenses if it is out of date"""
+        if not self._arrays_dirty:
+            return
+        self._amounts = array('d', [exp.amount for exp in self.expenses.values()])
+        self._date_keys = array('l', [exp._key for exp in self.expenses.values()])
+        self._cats = array('b', [_CATEGORY_INDEX[exp.category] for exp in self.expenses.values()])
+        self._arrays_dirty = False
+    
+    def _scan_expenses(self) -> ExpenseScan:
+        """Return the all-time expense aggregates, computing them at most once per change"""
+        if self._scan is None:
+            self._rebuild_arrays()
+            self._scan = _scan_columns(self._amounts, self._cats, self._date_keys, len(_CATEGORY_INDEX))
+        return self._scan
     
     def get_expenses_by_date_range(self, start_date: str, end_date: str) -> List[Expense]:
-        """Get expenses within a date range"""
+        """Get expenses within a date range, ordered by date"""
         try:
-            start = datetime.strptime(start_date, "%Y-%m-%d")
-            end = datetime.strptime(end_date, "%Y-%m-%d")
-            
-            filtered_expenses = []
-            for exp in self.expenses:
-                exp_date = datetime.strptime(exp.date, "%Y-%m-%d")
-                if start <= exp_date <= end:
-                    filtered_expenses.append(exp)
-            return filtered_expenses
+            lo = _checked_date_key(start_date)
+            hi = _checked_date_key(end_date)
         except ValueError:
             return []
+        
+        return self._date_slice(lo, hi)
+    
+    def _date_slice(self, lo: int, hi: int) -> List[Expense]:
+        """Expenses whose date key lies in [lo, hi], in ascending date order, via binary search"""
+        start = bisect_left(self._sorted_keys, lo)
+        end = bisect_right(self._sorted_keys, hi)
+        return self._sorted_by_date[start:end]
+    
+    def _sum_spent(self, category: Optional[ExpenseCategory], lo: Optional[int], hi: Optional[int]) -> float:
+        """Total for a category and/or inclusive date key range (None = any)"""
+        if lo is None:
+            if category is None:
+                return self._scan_expenses().total
+            return sum(expense.amount for expense in self._by_cat.get(category, []))
+        # Category and date filters are applied together so neither overwrites the other
+        return sum(expense.amount for expense in self._date_slice(lo, hi)
+                   if category is None or expense.category is category)
     
     def get_total_spent(self, category: ExpenseCategory = None, start_date: str = None, end_date: str = None) -> float:
         """Get total amount spent, optionally filtered by category and date range"""
-        expenses = self.expenses
-        
-        if category:
-            expenses = [exp for exp in expenses if exp.category == category]
-        
+        lo = hi = None
         if start_date and end_date:
-            # Filter the already-selected expenses by date range so we don't drop a prior
-            # category filter. Previously this reused get_expenses_by_date_range which
-            # returned expenses across all categories and overwrote the category filter.
             try:
-                start = datetime.strptime(start_date, "%Y-%m-%d")
-                end = datetime.strptime(end_date, "%Y-%m-%d")
-                expenses = [exp for exp in expenses if start <= datetime.strptime(exp.date, "%Y-%m-%d") <= end]
+                lo = _checked_date_key(start_date)
+                hi = _checked_date_key(end_date)
             except ValueError:
                 # If date parsing fails, fall back to no date filtering
-                pass
-
-        return sum(exp.amount for exp in expenses)
+                lo = hi = None
+        
+        return self._sum_spent(category, lo, hi)
     
     def get_total_spent_by_category(self, start_date: str = None, end_date: str = None) -> Dict[str, float]:
         """Get total spent for each category"""
-        category_totals = {category.value: 0.0 for category in ExpenseCategory}
+        if not (start_date and end_date):
+            totals = self._scan_expenses().cat_totals
+            return {category.value: totals[code] for category, code in _CATEGORY_INDEX.items()}
         
-        expenses = self.expenses
-        if start_date and end_date:
-            expenses = self.get_expenses_by_date_range(start_date, end_date)
-        
-        for expense in expenses:
-            category_totals[expense.category.value] += expense.amount
-        
-        return category_totals
+        try:
+            lo = _checked_date_key(start_date)
+            hi = _checked_date_key(end_date)
+        except ValueError:
+            # Matches get_expenses_by_date_range: an invalid range selects nothing
+            lo, hi = 1, 0
+        # One pass keyed by the enum member (no per-row .value lookup), then label once per category
+        totals = defaultdict(float)
+        for expense in self._date_slice(lo, hi):
+            totals[expense.category] += expense.amount
+        return {category.value: totals[category] for category in ExpenseCategory}
     
-    def set_budget(self, category: ExpenseCategory, amount: float, period: str = "monthly") -> Tuple[bool, str]:
+    def set_budget(self, category: ExpenseCategory, amount: float, period: BudgetPeriod = BudgetPeriod.MONTHLY) -> Tuple[bool, str]:
         """Set or update budget for a category"""
         try:
+            if not math.isfinite(amount):
+                return False, "Budget amount must be a finite number"
             if amount < 0:
                 return False, "Budget amount cannot be negative"
                 
             budget = Budget(category, amount, period)
+            previous = self.budgets.get(budget.id)
+            if previous is not None:
+                if previous.amount == amount:
+                    return True, f"Budget for {category.value} unchanged: ${amount} ({budget.period.value})"
+                self._budgets_by_cat[category].remove(previous)
             self.budgets[budget.id] = budget
+            self._budgets_by_cat.setdefault(category, []).append(budget)
             self.save_data()
-            return True, f"Budget set for {category.value}: ${amount} ({period})"
+            return True, f"Budget set for {category.value}: ${amount} ({budget.period.value})"
         except Exception as e:
             return False, f"Error setting budget: {e}"
     
-    def delete_budget(self, category: ExpenseCategory, period: str = None) -> Tuple[bool, str]:
+    def delete_budget(self, category: ExpenseCategory, period: BudgetPeriod = None) -> Tuple[bool, str]:
         """Delete budget for a category"""
-        if period:
-            budget_id = f"budget_{category.value}_{period}"
-        else:
+        if not period:
             # Delete all budgets for this category
-            budget_ids = [bid for bid in self.budgets.keys() if bid.startswith(f"budget_{category.value}_")]
-            if not budget_ids:
+            budgets = self._budgets_by_cat.pop(category, [])
+            if not budgets:
                 return False, f"No budget found for {category.value}"
             
-            for budget_id in budget_ids:
-                del self.budgets[budget_id]
+            for budget in budgets:
+                del self.budgets[budget.id]
             self.save_data()
             return True, f"All budgets deleted for {category.value}"
         
-        if budget_id in self.budgets:
-            del self.budgets[budget_id]
+        try:
+            budget = self.budgets.pop((category, BudgetPeriod(period)), None)
+        except ValueError:
+            budget = None
+        if budget is not None:
+            self._budgets_by_cat[category].remove(budget)
             self.save_data()
-            return True, f"Budget deleted for {category.value} ({period})"
-        return False, f"No budget found for {category.value} ({period})"
+            return True, f"Budget deleted for {category.value} ({budget.period.value})"
+        return False, f"No budget found for {category.value} ({getattr(period, 'value', period)})"
     
-    def get_budget_status(self, category: ExpenseCategory, period: str = "monthly") -> Dict:
+    def get_budget_status(self, category: ExpenseCategory, period: BudgetPeriod = BudgetPeriod.MONTHLY) -> Dict:
         """Get budget status for a category and period"""
-        budget_id = f"budget_{category.value}_{period}"
-        if budget_id not in self.budgets:
+        try:
+            period = BudgetPeriod(period)
+        except ValueError:
+            return {'has_budget': False}
+        budget = self.budgets.get((category, period))
+        if budget is None:
             return {'has_budget': False}
-        
-        budget = self.budgets[budget_id]
         
         # Calculate spending for this category in the current period
         spent = self.get_total_spent_by_period(category, period)
-        
+        return self._budget_status(budget, spent)
+    
+    def _budget_status(self, budget: Budget, spent: float) -> Dict:
+        """Build the status dict for a budget given what was spent in its period"""
         remaining = budget.amount - spent
         percentage_used = (spent / budget.amount) * 100 if budget.amount > 0 else 0
         
@@ -371,51 +862,70 @@ class ExpenseTracker:
             'remaining': remaining,
             'percentage_used': round(percentage_used, 2),
             'is_over_budget': spent > budget.amount,
-            'period': period
+            'period': budget.period.value
         }
     
-    def get_total_spent_by_period(self, category: ExpenseCategory, period: str) -> float:
+    def _period_bounds(self) -> Dict[BudgetPeriod, Tuple[int, int]]:
+        """Inclusive date key range of the current day, week and month"""
+        now = date.today()
+        today = _date_key(now)
+        week_start = _date_key(now - timedelta(days=now.weekday()))
+        return {
+            BudgetPeriod.DAILY: (today, today),
+            BudgetPeriod.WEEKLY: (week_start, today),
+            BudgetPeriod.MONTHLY: (today // 100 * 100 + 1, today)
+        }
+    
+    def get_total_spent_by_period(self, category: ExpenseCategory, period: BudgetPeriod) -> float:
         """Get total spent for a category in the current period"""
-        now = datetime.now()
-        
-        if period == "daily":
-            start_date = now.strftime("%Y-%m-%d")
-            end_date = start_date
-        elif period == "weekly":
-            start_date = (now - timedelta(days=now.weekday())).strftime("%Y-%m-%d")
-            end_date = now.strftime("%Y-%m-%d")
-        else:  # monthly
-            start_date = now.replace(day=1).strftime("%Y-%m-%d")
-            end_date = now.strftime("%Y-%m-%d")
+        lo, hi = self._period_bounds()[BudgetPeriod(period)]
         
         # Get spending only for the specific category within the date range
-        return self.get_total_spent(category, start_date, end_date)
+        return self._sum_spent(category, lo, hi)
+    
+    def _budget_spending(self) -> Dict[Tuple[ExpenseCategory, BudgetPeriod], float]:
+        """Spending in the current period for every budget, gathered in one pass"""
+        bounds = self._period_bounds()
+        totals = defaultdict(float)
+        if not self.budgets:
+            return totals
+        
+        # Only expenses from the earliest period start onwards can count towards any budget
+        lo = min(b[0] for b in bounds.values())
+        hi = max(b[1] for b in bounds.values())
+        for expense in self._date_slice(lo, hi):
+            key = expense._key
+            for period, (period_lo, period_hi) in bounds.items():
+                budget_id = (expense.category, period)
+                if period_lo <= key <= period_hi and budget_id in self.budgets:
+                    totals[budget_id] += expense.amount
+        return totals
     
     def get_all_budgets_with_status(self) -> List[Dict]:
         """Get all budgets with their current status"""
-        budgets_with_status = []
-        
-        for budget in self.budgets.values():
-            budget_status = self.get_budget_status(budget.category, budget.period)
-            if budget_status['has_budget']:
-                budgets_with_status.append({
-                    'category': budget.category.value,
-                    'period': budget.period,
-                    'status': budget_status
-                })
-        
-        return budgets_with_status
+        spending = self._budget_spending()
+        return [
+            {
+                'category': budget.category.value,
+                'period': budget.period.value,
+                'status': self._budget_status(budget, spending[budget.id])
+            }
+            for budget in self.budgets.values()
+        ]
     
     def get_spending_summary(self, start_date: str = None, end_date: str = None) -> Dict:
         """Get spending summary by category"""
+        today = date.today()
         if not start_date:
-            start_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+            start_date = (today - timedelta(days=30)).isoformat()
         if not end_date:
-            end_date = datetime.now().strftime("%Y-%m-%d")
+            end_date = today.isoformat()
         
         # Get actual spending for each category
         category_totals = self.get_total_spent_by_category(start_date, end_date)
         total_spent = sum(category_totals.values())
+        percentages = {value: (spent / total_spent * 100) if total_spent > 0 else 0
+                       for value, spent in category_totals.items()}
         
         summary = {
             'total_spent': total_spent,
@@ -423,6 +933,8 @@ class ExpenseTracker:
             'categories': {}
         }
         
+        spending = self._budget_spending()
+        
         # Add budget status for each category. Prefer a monthly budget if present;
         # otherwise use any existing budget period for that category so saved budgets
         # with weekly/daily periods are not ignored.
@@ -431,19 +943,19 @@ class ExpenseTracker:
             spent = category_totals[category_value]
 
             # Find budgets for this category
-            matching_budgets = [b for b in self.budgets.values() if b.category == category]
+            matching_budgets = self._budgets_by_cat.get(category)
 
             if not matching_budgets:
                 budget_status = {'has_budget': False}
             else:
                 # Prefer monthly if available
-                preferred = next((b for b in matching_budgets if b.period == 'monthly'), matching_budgets[0])
-                budget_status = self.get_budget_status(category, preferred.period)
+                preferred = next((b for b in matching_budgets if b.period is BudgetPeriod.MONTHLY), matching_budgets[0])
+                budget_status = self._budget_status(preferred, spending[preferred.id])
 
             summary['categories'][category_value] = {
                 'spent': spent,
                 'budget_status': budget_status,
-                'percentage_of_total': (spent / total_spent * 100) if total_spent > 0 else 0
+                'percentage_of_total': percentages[category_value]
             }
         
         return summary
@@ -471,12 +983,13 @@ class ExpenseTracker:
         }
         
         # Check for budget overruns across all periods
+        spending = self._budget_spending()
         for budget in self.budgets.values():
-            budget_status = self.get_budget_status(budget.category, budget.period)
-            if budget_status['has_budget'] and budget_status['is_over_budget']:
+            spent = spending[budget.id]
+            if spent > budget.amount:
                 insights['budget_alerts'].append(
-                    f"🚨 Over {budget.period} budget in {budget.category.value}: "
-                    f"${budget_status['spent']:.2f} / ${budget_status['budget_amount']:.2f}"
+                    f"🚨 Over {budget.period.value} budget in {budget.category.value}: "
+                    f"${spent:.2f} / ${budget.amount:.2f}"
                 )
         
         # Generate recommendations based on actual spending
@@ -513,12 +1026,31 @@ class ExpenseTracker:
         
         return insights
     
-    def get_all_expenses(self, sort_by: str = "date", reverse: bool = True) -> List[Expense]:
-        """Get all expenses for the user with sorting options"""
-        expenses = self.expenses.copy()
+    def get_all_expenses(self, sort_by: str = "date", reverse: bool = True,
+                         start_date: Union[str, date] = None, end_date: Union[str, date] = None) -> List[Expense]:
+        """Get all expenses for the user with sorting options, optionally limited to a date range.
         
+        Bounds may be date objects or "YYYY-MM-DD" strings; invalid strings raise ValueError.
+        """
+        if start_date and end_date:
+            # Filter through the date index before sorting so only matching rows are copied
+            lo = _bound_key(start_date)
+            hi = _bound_key(end_date)
+            return self._sort_expenses(self._date_slice(lo, hi), sort_by, reverse)
+        
+        # Unfiltered listings are kept until the next change; callers get their own copy
+        view = self._sorted_views.get((sort_by, reverse))
+        if view is None:
+            view = self._sort_expenses(list(self._sorted_by_date), sort_by, reverse)
+            self._sorted_views[(sort_by, reverse)] = view
+        return list(view)
+    
+    def _sort_expenses(self, expenses: List[Expense], sort_by: str, reverse: bool) -> List[Expense]:
+        """Sort a date-ordered list of expenses in place and return it"""
         if sort_by == "date":
-            expenses.sort(key=lambda x: x.date, reverse=reverse)
+            # The date index is already in ascending date order
+            if reverse:
+                expenses.reverse()
         elif sort_by == "amount":
             expenses.sort(key=lambda x: x.amount, reverse=reverse)
         elif sort_by == "category":
@@ -528,29 +1060,34 @@ class ExpenseTracker:
     
     def clear_all_data(self) -> Tuple[bool, str]:
         """Clear all expenses and budgets for the user"""
-        self.expenses = []
+        self.expenses = {}
         self.budgets = {}
+        self._rebuild_indexes()
         self.save_data()
         return True, "All data cleared successfully"
     
     def get_user_statistics(self) -> Dict:
         """Get comprehensive user statistics"""
-        total_expenses = len(self.expenses)
-        total_spent = self.get_total_spent()
+        scan = self._scan_expenses()
+        total_expenses = scan.count
+        total_spent = scan.total
         avg_expense = total_spent / total_expenses if total_expenses > 0 else 0
         
-        # Most used category by count
-        category_counts = {}
-        # Most spent category by amount
-        category_amounts = {}
+        # Most used category by count and most spent category by amount. Ties go to the
+        # category seen first in expense order, so list the used categories in that order
+        # (the scan only keeps per-category totals, so walk self.expenses until all are seen).
+        n_used = sum(1 for count in scan.cat_counts if count)
+        used = []
+        seen = set()
+        for expense in self.expenses.values():
+            if len(used) == n_used:
+                break
+            if expense.category not in seen:
+                seen.add(expense.category)
+                used.append((expense.category, _CATEGORY_INDEX[expense.category]))
         
-        for expense in self.expenses:
-            cat = expense.category.value
-            category_counts[cat] = category_counts.get(cat, 0) + 1
-            category_amounts[cat] = category_amounts.get(cat, 0) + expense.amount
-        
-        most_used_category = max(category_counts.items(), key=lambda x: x[1])[0] if category_counts else "None"
-        most_spent_category = max(category_amounts.items(), key=lambda x: x[1])[0] if category_amounts else "None"
+        most_used_category = max(used, key=lambda x: scan.cat_counts[x[1]])[0].value if used else "None"
+        most_spent_category = max(used, key=lambda x: scan.cat_totals[x[1]])[0].value if used else "None"
         
         return {
             'total_expenses': total_expenses,
@@ -559,8 +1096,8 @@ class ExpenseTracker:
             'most_used_category': most_used_category,
             'most_spent_category': most_spent_category,
             'active_budgets': len(self.budgets),
-            'first_expense_date': min([exp.date for exp in self.expenses]) if self.expenses else "No expenses",
-            'last_expense_date': max([exp.date for exp in self.expenses]) if self.expenses else "No expenses"
+            'first_expense_date': _date_from_key(scan.min_key) if scan.count else "No expenses",
+            'last_expense_date': _date_from_key(scan.max_key) if scan.count else "No expenses"
         }
 
 class ExpenseTrackerApp:
@@ -643,6 +1180,304 @@ def main():
         else:
             print("Invalid choice. Please try again.")
 
+def _handle_add_expense(tracker, app):
+    """Add a new expense"""
+    try:
+        amount = float(input("Enter amount: "))
+        print(f"Categories: {_CATEGORY_VALUES_STR}")
+        category_name = _norm(input("Enter category: "))
+        description = input("Enter description: ").strip()
+
+        category = _CATEGORY_BY_NAME.get(category_name)
+        if category is None:
+            print("Invalid category. Using 'Other'.")
+            category = ExpenseCategory.OTHER
+
+        success, message = tracker.add_expense(amount, category, description)
+        print(f"Result: {message}")
+        pause()
+
+    except ValueError:
+        print("Invalid amount. Please enter a number.")
+
+def _handle_edit_expense(tracker, app):
+    """Edit an expense selected by number or full ID"""
+    expenses = tracker.get_all_expenses()
+    if not expenses:
+        print("No expenses to edit.")
+        return
+
+    lines = ["", f"{'#':<4} {'ID':<25} {'Date':<12} {'Category':<15} {'Amount':<10} {'Description':<20}", "-" * 95]
+    lines += [_NUMBERED_EXPENSE_ROW_FMT(i, exp.id, exp.date, exp.category.value, exp.amount, exp.description)
+              for i, exp in enumerate(expenses, start=1)]
+    _write_lines(lines)
+
+    selection = input("Enter the number or full ID of the expense to edit: ").strip()
+    exp_id = None
+    if selection.isdigit():
+        # Numbers refer to the listing just printed
+        idx = int(selection) - 1
+        if idx < 0 or idx >= len(expenses):
+            print("Invalid selection number.")
+            return
+        exp_id = expenses[idx].id
+    else:
+        exp_id = selection
+
+    expense = tracker.get_expense(exp_id)
+    if not expense:
+        print("Expense not found.")
+        return
+
+    print("Leave input blank to keep current value.")
+    new_amount = input(f"Amount [{expense.amount}]: ").strip()
+    new_category = _norm(input(f"Category [{expense.category.value}]: "))
+    new_description = input(f"Description [{expense.description}]: ").strip()
+    new_date = input(f"Date (YYYY-MM-DD) [{expense.date}]: ").strip()
+
+    amt = None
+    cat = None
+    desc = None
+    dt = None
+
+    if new_amount:
+        try:
+            amt = float(new_amount)
+        except ValueError:
+            print("Invalid amount entered. Skipping amount update.")
+
+    if new_category:
+        cat = _CATEGORY_BY_NAME.get(new_category)
+        if cat is None:
+            print("Invalid category entered. Skipping category update.")
+
+    if new_description:
+        desc = new_description
+
+    if new_date:
+        # validate shape (precompiled regex) and calendar date
+        try:
+            _parse_ymd(new_date)
+            dt = new_date
+        except ValueError:
+            print("Invalid date format. Skipping date update.")
+
+    success, message = tracker.update_expense(exp_id, amount=amt, category=cat, description=desc, date=dt)
+    print(f"Result: {message}")
+    pause()
+
+def _handle_delete_expense(tracker, app):
+    """Delete an expense selected by number or full ID"""
+    expenses = tracker.get_all_expenses()
+    if not expenses:
+        print("No expenses to delete.")
+        return
+
+    lines = ["", f"{'#':<4} {'ID':<25} {'Date':<12} {'Category':<15} {'Amount':<10} {'Description':<20}", "-" * 95]
+    lines += [_NUMBERED_EXPENSE_ROW_FMT(i, exp.id, exp.date, exp.category.value, exp.amount, exp.description)
+              for i, exp in enumerate(expenses, start=1)]
+    _write_lines(lines)
+
+    selection = input("Enter the number or full ID of the expense to delete: ").strip()
+    exp_id = None
+    if selection.isdigit():
+        # Numbers refer to the listing just printed
+        idx = int(selection) - 1
+        if idx < 0 or idx >= len(expenses):
+            print("Invalid selection number.")
+            return
+        exp_id = expenses[idx].id
+    else:
+        exp_id = selection
+
+    confirm = _norm(input(f"Are you sure you want to delete expense {exp_id}? (y/N): "))
+    if confirm != 'y':
+        print("Deletion cancelled.")
+        return
+
+    success, message = tracker.delete_expense(exp_id)
+    print(f"Result: {message}")
+    pause()
+
+def _handle_view_expenses(tracker, app):
+    """List expenses for the chosen sort order and date range"""
+    # An empty ledger has nothing to sort or filter, so skip the prompts and date parsing
+    if not tracker.expenses:
+        print("No expenses found.")
+        pause()
+        return
+
+    print("\nSort by: (1) Date (2) Amount (3) Category")
+    sort_choice = input("Choose sort option (1-3) [1]: ").strip() or "1"
+
+    # Choose scope: current month, all, or custom date range
+    print("\nView: (1) Current month (2) All (3) Date range")
+    view_choice = input("Choose view option (1-3) [1]: ").strip() or "1"
+
+    # Work out the date range for the chosen view (None = all; "2" needs no parsing)
+    start_date = end_date = None
+    if view_choice == "1":
+        # current month
+        today = date.today()
+        start_date = today.replace(day=1)
+        end_date = today
+    elif view_choice == "3":
+        # custom date range
+        sd = input("Start date (YYYY-MM-DD): ").strip()
+        ed = input("End date (YYYY-MM-DD): ").strip()
+        try:
+            _parse_ymd(sd)
+            _parse_ymd(ed)
+            start_date, end_date = sd, ed
+        except ValueError:
+            print("Invalid date(s) entered. Showing all expenses.")
+
+    # Let the tracker filter by date before sorting
+    expenses = tracker.get_all_expenses(sort_by=_SORT_MAP.get(sort_choice, "date"),
+                                        start_date=start_date, end_date=end_date)
+
+    if not expenses:
+        print("No expenses found.")
+        pause()
+        return
+
+    # Header and formatted rows go to stdout in a single write
+    header = ("", f"{'Date':<12} {'Category':<15} {'Amount':<10} {'Description':<20}", "-" * 60)
+    _write_lines(chain(header, (_EXPENSE_ROW_FMT(expense.date, expense.category.value,
+                                                 expense.amount, expense.description)
+                                for expense in expenses)))
+    pause()
+
+def _handle_set_budget(tracker, app):
+    """Set or update a category budget"""
+    try:
+        print(f"Categories: {_CATEGORY_VALUES_STR}")
+        category_name = _norm(input("Enter category: "))
+        amount = float(input("Enter budget amount: "))
+        period = _norm(input("Enter period (daily/weekly/monthly) [monthly]: ")) or "monthly"
+
+        if period not in ["daily", "weekly", "monthly"]:
+            print("Invalid period. Using 'monthly'.")
+            period = "monthly"
+
+        category = _CATEGORY_BY_NAME.get(category_name)
+        if category is None:
+            print("Invalid category.")
+            return
+
+        success, message = tracker.set_budget(category, amount, period)
+        print(f"Result: {message}")
+
+    except ValueError:
+        print("Invalid amount. Please enter a number.")
+
+def _handle_view_budgets(tracker, app):
+    """Show every budget with its current status"""
+    print("\n=== Budget Status ===")
+    budgets_with_status = tracker.get_all_budgets_with_status()
+
+    if not budgets_with_status:
+        print("No budgets set. Use option 5 to set budgets.")
+    else:
+        lines = [f"{'Category':<15} {'Period':<10} {'Spent':<10} {'Budget':<10} {'Remaining':<12} {'Used %':<10} {'Status':<10}",
+                 "-" * 80]
+
+        for budget_info in budgets_with_status:
+            category = budget_info['category']
+            period = budget_info['period']
+            status = budget_info['status']
+
+            symbol, status_text = _STATUS[status['is_over_budget']]
+            lines.append(f"{category:<15} {period:<10} ${status['spent']:<9.2f} ${status['budget_amount']:<9.2f} "
+                         f"${status['remaining']:<11.2f} {status['percentage_used']:<9.1f}% {symbol} {status_text}")
+        _write_lines(lines)
+        pause()
+
+def _handle_delete_budget(tracker, app):
+    """Delete one or all budgets for a category"""
+    print(f"Categories: {_CATEGORY_VALUES_STR}")
+    category_name = _norm(input("Enter category: "))
+    period = _norm(input("Enter period to delete (or leave blank for all): "))
+
+    category = _CATEGORY_BY_NAME.get(category_name)
+    if category is None:
+        print("Invalid category.")
+        return
+
+    success, message = tracker.delete_budget(category, period if period else None)
+    print(f"Result: {message}")
+    pause()
+
+def _handle_spending_summary(tracker, app):
+    """Show the spending summary for the last 30 days"""
+    summary = tracker.get_spending_summary()
+    lines = ["",
+             f"=== Spending Summary ({summary['date_range']['start']} to {summary['date_range']['end']}) ===",
+             f"{'Category':<15} {'Spent':<10} {'% of Total':<12} {'Budget Status':<15}",
+             "-" * 60]
+
+    for category_name, data in summary['categories'].items():
+        spent = data['spent']
+        percentage = data['percentage_of_total']
+        budget_status = data['budget_status']
+
+        if budget_status['has_budget']:
+            symbol = _STATUS[budget_status['is_over_budget']][0]
+            status_str = f"${spent:.2f}/${budget_status['budget_amount']:.2f} ({budget_status['period']}) {symbol}"
+        else:
+            status_str = "No budget"
+
+        lines.append(f"{category_name:<15} ${spent:<9.2f} {percentage:<11.1f}% {status_str:<15}")
+
+    lines += ["", f"Total Spent: ${summary['total_spent']:.2f}"]
+    _write_lines(lines)
+    pause()
+
+def _handle_financial_insights(tracker, app):
+    """Show financial insights and recommendations"""
+    insights = tracker.get_financial_insights()
+    print("\n=== Financial Insights ===")
+    print(f"Total Monthly Spending: ${insights['total_monthly_spending']:.2f}")
+    print(f"Top Spending Category: {insights['top_category']}")
+
+    if insights['budget_alerts']:
+        print("\n🚨 Budget Alerts:")
+        for alert in insights['budget_alerts']:
+            print(f"  {alert}")
+
+    if insights['recommendations']:
+        print("\n💡 Recommendations:")
+        for rec in insights['recommendations']:
+            print(f"  {rec}")
+
+    print("\n🌟 Savings Tips:")
+    for tip in insights['savings_tips']:
+        print(f"  {tip}")
+    pause()
+
+def _handle_user_statistics(tracker, app):
+    """Show the user's expense statistics"""
+    user_info = app.get_current_user_info()
+    print("\n=== User Statistics ===")
+    for key, value in user_info.items():
+        if key not in ['username', 'registration_date', 'last_login']:
+            print(f"{key.replace('_', ' ').title()}: {value}")
+    pause()
+
+# Menu option -> handler; each handler takes (tracker, app)
+_MENU_HANDLERS = {
+    "1": _handle_add_expense,
+    "2": _handle_edit_expense,
+    "3": _handle_delete_expense,
+    "4": _handle_view_expenses,
+    "5": _handle_set_budget,
+    "6": _handle_view_budgets,
+    "7": _handle_delete_budget,
+    "8": _handle_spending_summary,
+    "9": _handle_financial_insights,
+    "10": _handle_user_statistics,
+}
+
 def user_menu(app):
     """User menu after login"""
     tracker = app.current_tracker
@@ -663,315 +1498,16 @@ def user_menu(app):
 
         choice = input("\nChoose option (1-11): ").strip()
 
-        if choice == "1":
-            # Add expense
-            try:
-                amount = float(input("Enter amount: "))
-                print("Categories: ", [cat.value for cat in ExpenseCategory])
-                category_name = input("Enter category: ").strip()
-                description = input("Enter description: ").strip()
-
-                category = None
-                for cat in ExpenseCategory:
-                    if cat.value.lower() == category_name.lower():
-                        category = cat
-                        break
-
-                if category is None:
-                    print("Invalid category. Using 'Other'.")
-                    category = ExpenseCategory.OTHER
-
-                success, message = tracker.add_expense(amount, category, description)
-                print(f"Result: {message}")
-                pause()
-
-            except ValueError:
-                print("Invalid amount. Please enter a number.")
-
-        elif choice == "2":
-            # Edit expense (select by number or full ID)
-            expenses = tracker.get_all_expenses()
-            if not expenses:
-                print("No expenses to edit.")
-                continue
-
-            print(f"\n{'#':<4} {'ID':<25} {'Date':<12} {'Category':<15} {'Amount':<10} {'Description':<20}")
-            print("-" * 95)
-            for i, exp in enumerate(expenses, start=1):
-                print(f"{i:<4} {exp.id:<25} {exp.date:<12} {exp.category.value:<15} ${exp.amount:<9.2f} {exp.description:<20}")
-
-            selection = input("Enter the number or full ID of the expense to edit: ").strip()
-            exp_id = None
-            if selection.isdigit():
-                idx = int(selection) - 1
-                if idx < 0 or idx >= len(expenses):
-                    print("Invalid selection number.")
-                    continue
-                exp_id = expenses[idx].id
-            else:
-                exp_id = selection
-
-            expense = tracker.get_expense(exp_id)
-            if not expense:
-                print("Expense not found.")
-                continue
-
-            print("Leave input blank to keep current value.")
-            new_amount = input(f"Amount [{expense.amount}]: ").strip()
-            new_category = input(f"Category [{expense.category.value}]: ").strip()
-            new_description = input(f"Description [{expense.description}]: ").strip()
-            new_date = input(f"Date (YYYY-MM-DD) [{expense.date}]: ").strip()
-
-            amt = None
-            cat = None
-            desc = None
-            dt = None
-
-            if new_amount:
-                try:
-                    amt = float(new_amount)
-                except ValueError:
-                    print("Invalid amount entered. Skipping amount update.")
-
-            if new_category:
-                for c in ExpenseCategory:
-                    if c.value.lower() == new_category.lower():
-                        cat = c
-                        break
-                if cat is None:
-                    print("Invalid category entered. Skipping category update.")
-
-            if new_description:
-                desc = new_description
-
-            if new_date:
-                # basic validation
-                try:
-                    datetime.strptime(new_date, "%Y-%m-%d")
-                    dt = new_date
-                except ValueError:
-                    print("Invalid date format. Skipping date update.")
-
-            success, message = tracker.update_expense(exp_id, amount=amt, category=cat, description=desc, date=dt)
-            print(f"Result: {message}")
-            pause()
-
-        elif choice == "3":
-            # Delete expense (select by number or full ID)
-            expenses = tracker.get_all_expenses()
-            if not expenses:
-                print("No expenses to delete.")
-                continue
-
-            print(f"\n{'#':<4} {'ID':<25} {'Date':<12} {'Category':<15} {'Amount':<10} {'Description':<20}")
-            print("-" * 95)
-            for i, exp in enumerate(expenses, start=1):
-                print(f"{i:<4} {exp.id:<25} {exp.date:<12} {exp.category.value:<15} ${exp.amount:<9.2f} {exp.description:<20}")
-
-            selection = input("Enter the number or full ID of the expense to delete: ").strip()
-            exp_id = None
-            if selection.isdigit():
-                idx = int(selection) - 1
-                if idx < 0 or idx >= len(expenses):
-                    print("Invalid selection number.")
-                    continue
-                exp_id = expenses[idx].id
-            else:
-                exp_id = selection
-
-            confirm = input(f"Are you sure you want to delete expense {exp_id}? (y/N): ").strip().lower()
-            if confirm != 'y':
-                print("Deletion cancelled.")
-                continue
-
-            success, message = tracker.delete_expense(exp_id)
-            print(f"Result: {message}")
-            pause()
-
-        elif choice == "4":
-            # View expenses
-            print("\nSort by: (1) Date (2) Amount (3) Category")
-            sort_choice = input("Choose sort option (1-3) [1]: ").strip() or "1"
-
-            # Choose scope: current month, all, or custom date range
-            print("\nView: (1) Current month (2) All (3) Date range")
-            view_choice = input("Choose view option (1-3) [1]: ").strip() or "1"
-
-            # Get sorted expenses first
-            if sort_choice == "2":
-                expenses = tracker.get_all_expenses(sort_by="amount")
-            elif sort_choice == "3":
-                expenses = tracker.get_all_expenses(sort_by="category")
-            else:
-                expenses = tracker.get_all_expenses(sort_by="date")
-
-            # Apply view filter if needed
-            if view_choice == "1":
-                # current month
-                now = datetime.now()
-                start_date = now.replace(day=1).strftime("%Y-%m-%d")
-                end_date = now.strftime("%Y-%m-%d")
-                try:
-                    start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-                    end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-                    expenses = [exp for exp in expenses if start_dt <= datetime.strptime(exp.date, "%Y-%m-%d") <= end_dt]
-                except ValueError:
-                    # fallback to all if parsing fails
-                    pass
-            elif view_choice == "3":
-                # custom date range
-                sd = input("Start date (YYYY-MM-DD): ").strip()
-                ed = input("End date (YYYY-MM-DD): ").strip()
-                try:
-                    start_dt = datetime.strptime(sd, "%Y-%m-%d")
-                    end_dt = datetime.strptime(ed, "%Y-%m-%d")
-                    expenses = [exp for exp in expenses if start_dt <= datetime.strptime(exp.date, "%Y-%m-%d") <= end_dt]
-                except ValueError:
-                    print("Invalid date(s) entered. Showing all expenses.")
-
-            if not expenses:
-                print("No expenses found.")
-            else:
-                print(f"\n{'Date':<12} {'Category':<15} {'Amount':<10} {'Description':<20}")
-                print("-" * 60)
-                for expense in expenses:
-                    print(f"{expense.date:<12} {expense.category.value:<15} ${expense.amount:<9.2f} {expense.description:<20}")
-            pause()
-
-        elif choice == "5":
-            # Set budget
-            try:
-                print("Categories: ", [cat.value for cat in ExpenseCategory])
-                category_name = input("Enter category: ").strip()
-                amount = float(input("Enter budget amount: "))
-                period = input("Enter period (daily/weekly/monthly) [monthly]: ").strip() or "monthly"
-
-                if period not in ["daily", "weekly", "monthly"]:
-                    print("Invalid period. Using 'monthly'.")
-                    period = "monthly"
-
-                category = None
-                for cat in ExpenseCategory:
-                    if cat.value.lower() == category_name.lower():
-                        category = cat
-                        break
-
-                if category is None:
-                    print("Invalid category.")
-                    continue
-
-                success, message = tracker.set_budget(category, amount, period)
-                print(f"Result: {message}")
-
-            except ValueError:
-                print("Invalid amount. Please enter a number.")
-
-        elif choice == "6":
-            # View budgets
-            print("\n=== Budget Status ===")
-            budgets_with_status = tracker.get_all_budgets_with_status()
-
-            if not budgets_with_status:
-                print("No budgets set. Use option 5 to set budgets.")
-            else:
-                print(f"{'Category':<15} {'Period':<10} {'Spent':<10} {'Budget':<10} {'Remaining':<12} {'Used %':<10} {'Status':<10}")
-                print("-" * 80)
-
-                for budget_info in budgets_with_status:
-                    category = budget_info['category']
-                    period = budget_info['period']
-                    status = budget_info['status']
-
-                    symbol = "🔴" if status['is_over_budget'] else "🟢"
-                    status_text = "OVER" if status['is_over_budget'] else "OK"
-                    print(f"{category:<15} {period:<10} ${status['spent']:<9.2f} ${status['budget_amount']:<9.2f} "
-                          f"${status['remaining']:<11.2f} {status['percentage_used']:<9.1f}% {symbol} {status_text}")
-                pause()
-
-        elif choice == "7":
-            # Delete budget
-            print("Categories: ", [cat.value for cat in ExpenseCategory])
-            category_name = input("Enter category: ").strip()
-            period = input("Enter period to delete (or leave blank for all): ").strip()
-
-            category = None
-            for cat in ExpenseCategory:
-                if cat.value.lower() == category_name.lower():
-                    category = cat
-                    break
-
-            if category is None:
-                print("Invalid category.")
-                continue
-
-            success, message = tracker.delete_budget(category, period if period else None)
-            print(f"Result: {message}")
-            pause()
-
-        elif choice == "8":
-            # Spending summary
-            summary = tracker.get_spending_summary()
-            print(f"\n=== Spending Summary ({summary['date_range']['start']} to {summary['date_range']['end']}) ===")
-            print(f"{'Category':<15} {'Spent':<10} {'% of Total':<12} {'Budget Status':<15}")
-            print("-" * 60)
-
-            for category_name, data in summary['categories'].items():
-                spent = data['spent']
-                percentage = data['percentage_of_total']
-                budget_status = data['budget_status']
-
-                if budget_status['has_budget']:
-                    status_str = f"${spent:.2f}/${budget_status['budget_amount']:.2f} ({budget_status['period']})"
-                    if budget_status['is_over_budget']:
-                        status_str += " 🔴"
-                    else:
-                        status_str += " 🟢"
-                else:
-                    status_str = "No budget"
-
-                print(f"{category_name:<15} ${spent:<9.2f} {percentage:<11.1f}% {status_str:<15}")
-
-            print(f"\nTotal Spent: ${summary['total_spent']:.2f}")
-            pause()
-
-        elif choice == "9":
-            # Financial insights
-            insights = tracker.get_financial_insights()
-            print("\n=== Financial Insights ===")
-            print(f"Total Monthly Spending: ${insights['total_monthly_spending']:.2f}")
-            print(f"Top Spending Category: {insights['top_category']}")
-
-            if insights['budget_alerts']:
-                print("\n🚨 Budget Alerts:")
-                for alert in insights['budget_alerts']:
-                    print(f"  {alert}")
-
-            if insights['recommendations']:
-                print("\n💡 Recommendations:")
-                for rec in insights['recommendations']:
-                    print(f"  {rec}")
-
-            print("\n🌟 Savings Tips:")
-            for tip in insights['savings_tips']:
-                print(f"  {tip}")
-            pause()
-
-        elif choice == "10":
-            # User statistics
-            user_info = app.get_current_user_info()
-            print("\n=== User Statistics ===")
-            for key, value in user_info.items():
-                if key not in ['username', 'registration_date', 'last_login']:
-                    print(f"{key.replace('_', ' ').title()}: {value}")
-            pause()
-
-        elif choice == "11":
+        if choice == "11":
             # Logout
             print(app.logout())
             break
 
-        else:
+        handler = _MENU_HANDLERS.get(choice)
+        if handler is None:
             print("Invalid choice. Please try again.")
+        else:
+            handler(tracker, app)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file